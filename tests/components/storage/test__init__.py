@@ -6,17 +6,24 @@ import os
 import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
 import pytest
+from sqlalchemy.exc import SQLAlchemyError
 
-from viseron.components.storage import Storage, _get_tier_config
+from viseron.components.storage import (
+    TIER_CATEGORIES,
+    Storage,
+    _build_tier_plan,
+    _get_tier_config,
+)
 from viseron.components.storage.const import (
     CONFIG_CHECK_INTERVAL,
     CONFIG_CONTINUOUS,
     CONFIG_DAYS,
     CONFIG_EVENTS,
     CONFIG_HOURS,
+    CONFIG_MIGRATION_MODE,
     CONFIG_MINUTES,
     CONFIG_MOVE_ON_SHUTDOWN,
     CONFIG_PATH,
@@ -26,6 +33,9 @@ from viseron.components.storage.const import (
     CONFIG_SNAPSHOTS,
     CONFIG_TIERS,
     DEFAULT_RECORDER_TIERS,
+    MIGRATION_MODE_ASYNC,
+    MIGRATION_MODE_SKIP,
+    MIGRATION_MODE_SYNC,
 )
 from viseron.domains.camera.const import CONFIG_STORAGE
 
@@ -39,6 +49,11 @@ CONFIG = {
     CONFIG_SNAPSHOTS: {"test": "test"},
 }
 
+MINIMAL_CONFIG = {
+    CONFIG_RECORDER: {CONFIG_TIERS: []},
+    CONFIG_SNAPSHOTS: {CONFIG_TIERS: []},
+}
+
 
 @pytest.mark.parametrize(
     "config, camera_config, expected",
@@ -128,6 +143,49 @@ def test_get_tier_config(config, camera_config, expected) -> None:
     assert _get_tier_config(config, mocked_camera) == expected
 
 
+def test_get_tier_config_no_overrides() -> None:
+    """Test that a camera without overrides gets the shared config back.
+
+    Returning the same object lets create_tier_handlers reuse the
+    precomputed tier plan instead of rebuilding it per camera.
+    """
+    mocked_camera = MockCamera(
+        config={
+            CONFIG_RECORDER: {
+                CONFIG_CONTINUOUS: {},
+                CONFIG_EVENTS: {},
+                CONFIG_STORAGE: {},
+            },
+        }
+    )
+    assert _get_tier_config(CONFIG, mocked_camera) is CONFIG
+
+
+def test_build_tier_plan() -> None:
+    """Test that the tier plan pairs each tier with its successor."""
+    tier1 = {CONFIG_PATH: "/tier1/"}
+    tier2 = {CONFIG_PATH: "/tier2/"}
+    snapshot_tier = {CONFIG_PATH: "/snapshots/"}
+    config = {
+        CONFIG_RECORDER: {CONFIG_TIERS: [tier1, tier2]},
+        CONFIG_SNAPSHOTS: {CONFIG_TIERS: [snapshot_tier]},
+    }
+    plan = _build_tier_plan(config)
+
+    recorder_entries = [entry for entry in plan if entry[0] == CONFIG_RECORDER]
+    snapshot_entries = [entry for entry in plan if entry[0] == CONFIG_SNAPSHOTS]
+    assert len(recorder_entries) == 2 * len(TIER_CATEGORIES["recorder"])
+    assert len(snapshot_entries) == len(TIER_CATEGORIES["snapshots"])
+    for _, index, tier, next_tier, subcategory in recorder_entries:
+        assert tier is (tier1 if index == 0 else tier2)
+        assert next_tier is (tier2 if index == 0 else None)
+        assert subcategory in TIER_CATEGORIES["recorder"]
+    for _, index, tier, next_tier, _ in snapshot_entries:
+        assert index == 0
+        assert tier is snapshot_tier
+        assert next_tier is None
+
+
 class TestStorage:
     """Test the Storage class."""
 
@@ -158,3 +216,135 @@ class TestStorage:
                 "test_subcategory",
                 os.path.join(tier1, "test_path"),
             ) == os.path.join(tier2, "test_path")
+
+    @pytest.mark.parametrize(
+        "migration_mode, applied_directly, applied_in_thread",
+        [
+            (MIGRATION_MODE_ASYNC, False, True),
+            (MIGRATION_MODE_SYNC, True, False),
+            (MIGRATION_MODE_SKIP, False, False),
+        ],
+    )
+    def test_create_database_migration_mode(
+        self, migration_mode, applied_directly, applied_in_thread
+    ) -> None:
+        """Test that create_database dispatches on migration_mode."""
+        storage = Storage(
+            Mock(), {**MINIMAL_CONFIG, CONFIG_MIGRATION_MODE: migration_mode}
+        )
+        with patch.object(storage, "_open_engine"), patch.object(
+            Storage, "_read_cached_head", return_value=None
+        ), patch.object(storage, "_apply_migrations") as apply_migrations, patch(
+            "viseron.components.storage.threading.Thread"
+        ) as thread:
+            storage.create_database()
+
+            assert apply_migrations.called is applied_directly
+            assert thread.called is applied_in_thread
+            if applied_in_thread:
+                assert thread.call_args.kwargs["target"] == storage._apply_migrations
+                thread.return_value.start.assert_called_once()
+        if migration_mode == MIGRATION_MODE_SKIP:
+            assert storage.migrations_done
+
+    def test_cached_head_roundtrip(self, tmp_path) -> None:
+        """Test that the written head revision is read back."""
+        cache_file = str(tmp_path / ".alembic_head")
+        with patch("viseron.components.storage.ALEMBIC_HEAD_CACHE", cache_file), patch(
+            "viseron.components.storage._alembic_head", return_value="abc123"
+        ):
+            assert Storage._read_cached_head() is None
+            Storage._write_cached_head()
+            assert Storage._read_cached_head() == "abc123"
+            Storage._invalidate_cached_head()
+            assert Storage._read_cached_head() is None
+
+    def test_create_database_cached_head(self) -> None:
+        """Test that a matching cached head skips the migration check."""
+        storage = Storage(Mock(), MINIMAL_CONFIG)
+        with patch.object(storage, "_open_engine"), patch.object(
+            Storage, "_read_cached_head", return_value="abc123"
+        ), patch(
+            "viseron.components.storage._alembic_head", return_value="abc123"
+        ), patch.object(
+            storage, "_apply_migrations"
+        ) as apply_migrations:
+            storage.create_database()
+
+        apply_migrations.assert_not_called()
+        assert storage.migrations_done
+
+    def test_create_database_cached_head_mismatch(self) -> None:
+        """Test that a cached head for an older revision runs the migration check."""
+        storage = Storage(Mock(), {**MINIMAL_CONFIG, CONFIG_MIGRATION_MODE: "sync"})
+        with patch.object(storage, "_open_engine"), patch.object(
+            Storage, "_read_cached_head", return_value="abc123"
+        ), patch(
+            "viseron.components.storage._alembic_head", return_value="def456"
+        ), patch.object(
+            storage, "_apply_migrations"
+        ) as apply_migrations:
+            storage.create_database()
+
+        apply_migrations.assert_called_once()
+
+    def test_create_database_cached_head_stale(self, tmp_path) -> None:
+        """Test falling back to the migration check when the database was wiped.
+
+        The cache file survives a wiped database, so a database error on the
+        fast path must invalidate the cache and run the full check.
+        """
+        cache_file = tmp_path / ".alembic_head"
+        cache_file.write_text("abc123", encoding="utf-8")
+        storage = Storage(Mock(), {**MINIMAL_CONFIG, CONFIG_MIGRATION_MODE: "sync"})
+        storage._session_factory = Mock()
+        with patch(
+            "viseron.components.storage.ALEMBIC_HEAD_CACHE", str(cache_file)
+        ), patch.object(storage, "_open_engine"), patch(
+            "viseron.components.storage._alembic_head", return_value="abc123"
+        ), patch(
+            "viseron.components.storage.startup_chores",
+            side_effect=SQLAlchemyError("relation does not exist"),
+        ), patch.object(
+            storage, "_apply_migrations"
+        ) as apply_migrations:
+            storage.create_database()
+
+        apply_migrations.assert_called_once()
+        assert not cache_file.exists()
+
+    def test_session_scope_commits(self) -> None:
+        """Test that session_scope commits and closes on a clean exit."""
+        session = Mock()
+        self._storage._migrations_done.set()
+        self._storage._session_factory = Mock(return_value=session)
+        with self._storage.session_scope():
+            pass
+
+        session.commit.assert_called_once()
+        session.rollback.assert_not_called()
+        session.close.assert_called_once()
+
+    def test_session_scope_rolls_back(self) -> None:
+        """Test that session_scope rolls back, closes and re-raises on error."""
+        session = Mock()
+        self._storage._migrations_done.set()
+        self._storage._session_factory = Mock(return_value=session)
+        with pytest.raises(ValueError), self._storage.session_scope():
+            raise ValueError("boom")
+
+        session.commit.assert_not_called()
+        session.rollback.assert_called_once()
+        session.close.assert_called_once()
+
+    def test_get_session_after_failed_migrations(self) -> None:
+        """Test that get_session refuses to hand out sessions after a failure."""
+        self._storage._session_factory = Mock()
+        with patch.object(
+            Storage, "_current_revision", side_effect=RuntimeError("boom")
+        ):
+            self._storage._apply_migrations()
+
+        assert self._storage.migrations_done
+        with pytest.raises(RuntimeError):
+            self._storage.get_session()
@@ -9,6 +9,8 @@ from viseron.components.storage import CONFIG_SCHEMA, validate_tiers
 
 DEFAULT_CONFIG = {
     "storage": {
+        "migration_mode": "async",
+        "pool_size": None,
         "recorder": {
             "tiers": [
                 {
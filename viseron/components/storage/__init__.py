@@ -2,18 +2,26 @@
 from __future__ import annotations
 
 import copy
+import io
 import logging
 import os
 import pathlib
-from collections.abc import Callable
-from typing import TYPE_CHECKING, Any, Literal, TypedDict
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from configparser import ConfigParser
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Literal, TextIO, TypedDict
+from weakref import WeakSet
 
 import voluptuous as vol
 from alembic import command, script
 from alembic.config import Config
 from alembic.migration import MigrationContext
-from sqlalchemy import Engine, create_engine, update
-from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy import Engine, create_engine, event, make_url, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
 
 from viseron.components.storage.config import (
     STORAGE_SCHEMA,
@@ -24,15 +32,20 @@ from viseron.components.storage.const import (
     COMPONENT,
     CONFIG_CONTINUOUS,
     CONFIG_EVENTS,
+    CONFIG_MIGRATION_MODE,
     CONFIG_MOVE_ON_SHUTDOWN,
     CONFIG_PATH,
     CONFIG_POLL,
+    CONFIG_POOL_SIZE,
     CONFIG_RECORDER,
     CONFIG_SNAPSHOTS,
     CONFIG_TIERS,
     DATABASE_URL,
     DEFAULT_COMPONENT,
+    DEFAULT_MIGRATION_MODE,
     DESC_COMPONENT,
+    MIGRATION_MODE_ASYNC,
+    MIGRATION_MODE_SKIP,
 )
 from viseron.components.storage.models import Base, Motion, Recordings
 from viseron.components.storage.tier_handler import (
@@ -48,7 +61,7 @@ from viseron.components.storage.util import (
     get_snapshots_path,
     get_thumbnails_path,
 )
-from viseron.const import EVENT_DOMAIN_REGISTERED, VISERON_SIGNAL_STOPPING
+from viseron.const import EVENT_DOMAIN_REGISTERED, STORAGE_PATH, VISERON_SIGNAL_STOPPING
 from viseron.domains.camera.const import CONFIG_STORAGE, DOMAIN as CAMERA_DOMAIN
 from viseron.helpers import utcnow
 from viseron.helpers.logs import StreamToLogger
@@ -59,6 +72,16 @@ if TYPE_CHECKING:
 
 LOGGER = logging.getLogger(__name__)
 
+_BASE_PATH = pathlib.Path(__file__).parent.resolve()
+_ALEMBIC_INI = str(_BASE_PATH / "alembic.ini")
+_ALEMBIC_DIR = str(_BASE_PATH / "alembic")
+
+# File caching the last applied revision, used to skip the migration check
+ALEMBIC_HEAD_CACHE = os.path.join(STORAGE_PATH, ".alembic_head")
+
+_ALEMBIC_LOGGER = logging.getLogger("alembic.stdout")
+_ALEMBIC_SINK = StreamToLogger(_ALEMBIC_LOGGER, logging.INFO)
+
 
 CONFIG_SCHEMA = vol.Schema(
     vol.All(
@@ -128,6 +151,74 @@ TIER_CATEGORIES: TierCategories = {
 }
 
 
+# Flat (category, subcategory) view of TIER_CATEGORIES, frozen at import so
+# building a tier plan does not re-index the TypedDict
+_TIER_FLAT: tuple[tuple[str, TierSubcategory], ...] = tuple(
+    (category, subcategory)
+    for category, subcategories in TIER_CATEGORIES.items()
+    for subcategory in subcategories
+)
+
+TierPlanEntry = tuple[str, int, dict[str, Any], dict[str, Any] | None, TierSubcategory]
+
+
+def _build_tier_plan(config: dict[str, Any]) -> tuple[TierPlanEntry, ...]:
+    """Flatten the tier config into (category, index, tier, next_tier, subcategory).
+
+    The plan is built once per config instead of re-zipping the nested dicts
+    for every registered camera.
+    """
+    plan: list[TierPlanEntry] = []
+    # (tier, next_tier) pairs per category, zipped once instead of branching
+    # on the index for every subcategory
+    tier_pairs: dict[str, list[tuple[dict[str, Any], dict[str, Any] | None]]] = {}
+    for category, subcategory in _TIER_FLAT:
+        pairs = tier_pairs.get(category)
+        if pairs is None:
+            tiers = config[category][CONFIG_TIERS]
+            pairs = list(zip(tiers, list(tiers[1:]) + [None]))
+            tier_pairs[category] = pairs
+        for index, (tier, next_tier) in enumerate(pairs):
+            plan.append((category, index, tier, next_tier, subcategory))
+    return tuple(plan)
+
+
+@lru_cache(maxsize=1)
+def _alembic_head() -> str | None:
+    """Return the head revision of the bundled migration scripts.
+
+    Computed lazily and cached since it walks alembic/versions, which importers
+    of this module and fresh installs should not have to pay for.
+    """
+    return script.ScriptDirectory(_ALEMBIC_DIR).get_current_head()
+
+
+@lru_cache(maxsize=1)
+def _load_alembic_ini() -> ConfigParser:
+    """Parse alembic.ini once.
+
+    Storage is instantiated once per process in production but repeatedly
+    under tests, and the parsed ini never changes.
+    """
+    parser = ConfigParser({"here": str(_BASE_PATH)})
+    parser.read(_ALEMBIC_INI, encoding="utf-8")
+    return parser
+
+
+def _sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    """Apply pragmas that speed up SQLite when it is used for development.
+
+    WAL mode allows concurrent readers and cuts the fsync-per-commit cost that
+    otherwise serializes the tier handler writes.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
 def setup(vis: Viseron, config: dict[str, Any]) -> bool:
     """Set up storage component."""
     vis.data[COMPONENT] = Storage(vis, config[COMPONENT])
@@ -173,23 +264,44 @@ class Storage:
         self._camera_tier_handlers: dict[
             str, dict[str, list[dict[str, SnapshotTierHandler | SegmentsTierHandler]]]
         ] = {}
+        # Resolved paths keyed on (camera identifier, subcategory). The first
+        # tier of a camera never changes once the tier handlers are created,
+        # so the joined paths can be cached for the hot accessors below
+        self._camera_path_cache: dict[tuple[str, str], str] = {}
         self.camera_requested_files_count: dict[str, RequestedFilesCount] = {}
 
         self.ignored_files: list[str] = []
         self.engine: Engine | None = None
-        self._get_session: Callable[[], Session] | None = None
+        self._session_factory: sessionmaker[Session] | None = None
+        self._open_sessions: WeakSet[Session] = WeakSet()
+        self._migrations_done = threading.Event()
+        self._migrations_failed = False
+        self._tier_plan: tuple[TierPlanEntry, ...] | None = None
+        self._tier_handler_executor: ThreadPoolExecutor | None = None
 
     @property
     def camera_tier_handlers(self):
         """Return camera tier handlers."""
         return self._camera_tier_handlers
 
+    @property
+    def migrations_done(self) -> bool:
+        """Return if database migrations have finished."""
+        return self._migrations_done.is_set()
+
     def initialize(self) -> None:
         """Initialize storage component."""
         self._alembic_cfg = self._get_alembic_config()
         self.create_database()
         setup_triggers(self.engine)
 
+        self._tier_plan = _build_tier_plan(self._config)
+        # Shared between tier handler construction and the tier move tasks
+        self._tier_handler_executor = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 4) * 4),
+            thread_name_prefix="tier_handler",
+        )
+
         self._vis.listen_event(
             EVENT_DOMAIN_REGISTERED.format(domain=CAMERA_DOMAIN),
             self._camera_registered,
@@ -197,17 +309,19 @@ class Storage:
         self._vis.register_signal_handler(VISERON_SIGNAL_STOPPING, self._shutdown)
 
     def _get_alembic_config(self) -> Config:
-        base_path = pathlib.Path(__file__).parent.resolve()
-        alembic_cfg = Config(
-            os.path.join(base_path, "alembic.ini"),
-            stdout=StreamToLogger(
-                logging.getLogger("alembic.stdout"),
-                logging.INFO,
-            ),
-        )
-        alembic_cfg.set_main_option(
-            "script_location", os.path.join(base_path, "alembic")
-        )
+        # Routing every alembic progress line through the logging framework
+        # slows down large migrations considerably. The warnings around the
+        # upgrade already surface the state, so alembic stdout is discarded
+        # unless debug logging is enabled.
+        stdout: TextIO
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            stdout = _ALEMBIC_SINK
+        else:
+            stdout = io.StringIO()
+        alembic_cfg = Config(stdout=stdout)
+        alembic_cfg.config_file_name = _ALEMBIC_INI
+        alembic_cfg.file_config = _load_alembic_ini()
+        alembic_cfg.set_main_option("script_location", _ALEMBIC_DIR)
         return alembic_cfg
 
     def _run_migrations(self) -> None:
@@ -215,9 +329,14 @@ class Storage:
 
         Checks to see if there are any upgrades to be done and applies them.
         """
+        if self.engine and self.engine.dialect.name == "postgresql":
+            # Lets migrations run DDL that cannot execute inside a
+            # transaction, such as util.create_index_concurrently
+            self._alembic_cfg.attributes["transactional_ddl"] = False
         LOGGER.warning("Upgrading database, DO NOT INTERRUPT")
         command.upgrade(self._alembic_cfg, "head")
         LOGGER.warning("Database upgrade complete")
+        self._write_cached_head()
 
     def _create_new_db(self) -> None:
         """Create and stamp a new DB for fresh installs."""
@@ -228,57 +347,217 @@ class Storage:
         try:
             Base.metadata.create_all(self.engine)
             command.stamp(self._alembic_cfg, "head")
+            self._write_cached_head()
         except Exception as error:  # pylint: disable=[broad-exception-caught]
             LOGGER.error(f"Failed to create new database: {error}", exc_info=True)
 
-    def create_database(self) -> None:
-        """Create database."""
-        self.engine = create_engine(
-            DATABASE_URL, connect_args={"options": "-c timezone=UTC"}
+    def _open_engine(self) -> None:
+        """Open the database engine without touching the schema.
+
+        Does not apply any migrations, making it safe to call without blocking
+        startup.
+        """
+        engine_kwargs: dict[str, Any] = {}
+        # The pool tuning and connect_args are PostgreSQL specific. SQLite is
+        # only used for development, where the pragmas below apply instead
+        if make_url(DATABASE_URL).get_backend_name() == "postgresql":
+            pool_size = self._config.get(CONFIG_POOL_SIZE) or max(
+                10, (os.cpu_count() or 1) * 2
+            )
+            engine_kwargs = {
+                "connect_args": {
+                    "options": "-c timezone=UTC -c statement_timeout=30000",
+                },
+                "pool_size": pool_size,
+                "max_overflow": 20,
+                "pool_pre_ping": True,
+                "pool_recycle": 1800,
+                "isolation_level": "READ COMMITTED",
+            }
+        self.engine = create_engine(DATABASE_URL, **engine_kwargs)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _sqlite_pragmas)
+        self._session_factory = sessionmaker(
+            bind=self.engine, future=True, expire_on_commit=False
         )
 
-        conn = self.engine.connect()
-        context = MigrationContext.configure(conn)
-        current_rev = context.get_current_revision()
+    def _current_revision(self) -> str | None:
+        """Return the revision the database is currently stamped with."""
+        if self.engine is None:
+            raise RuntimeError("The database connection has not been established")
+
+        with self.engine.connect() as conn:
+            context = MigrationContext.configure(conn)
+            current_rev = context.get_current_revision()
         LOGGER.debug(f"Current database revision: {current_rev}")
+        return current_rev
 
-        _script = script.ScriptDirectory.from_config(self._alembic_cfg)
+    @staticmethod
+    def _read_cached_head() -> str | None:
+        """Return the head revision cached by the previous boot."""
+        try:
+            with open(ALEMBIC_HEAD_CACHE, encoding="utf-8") as cache_file:
+                return cache_file.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_cached_head() -> None:
+        """Cache the applied head revision so the next boot can skip the check."""
+        head = _alembic_head()
+        if head is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(ALEMBIC_HEAD_CACHE), exist_ok=True)
+            with open(ALEMBIC_HEAD_CACHE, "w", encoding="utf-8") as cache_file:
+                cache_file.write(head)
+        except OSError as error:
+            LOGGER.debug(f"Failed to write alembic head cache: {error}")
+
+    @staticmethod
+    def _invalidate_cached_head() -> None:
+        """Remove the cached head revision."""
+        try:
+            os.remove(ALEMBIC_HEAD_CACHE)
+        except OSError:
+            pass
 
-        if current_rev is None:
-            self._create_new_db()
-        elif current_rev != _script.get_current_head():
-            self._run_migrations()
+    def _apply_migrations(self) -> None:
+        """Create or migrate the database, then unblock database access."""
+        try:
+            current_rev = self._current_revision()
+
+            if current_rev is None:
+                # Fresh install, no revision comparison (and thus no
+                # script directory walk) needed
+                self._create_new_db()
+            elif current_rev != _alembic_head():
+                self._run_migrations()
+            else:
+                self._write_cached_head()
+
+            if self._session_factory:
+                startup_chores(self._session_factory)
+        except Exception as error:  # pylint: disable=[broad-exception-caught]
+            # Migrations run in a background thread by default, so a raised
+            # error would otherwise only end up on stderr while get_session
+            # happily hands out sessions against a half-migrated schema
+            LOGGER.error(f"Failed to migrate database: {error}", exc_info=True)
+            self._migrations_failed = True
+        finally:
+            self._migrations_done.set()
+
+    def create_database(self) -> None:
+        """Create database.
+
+        Migrations are applied in a background thread by default so that
+        startup is not blocked. get_session will block until they are done.
+        """
+        self._open_engine()
+
+        migration_mode = self._config.get(CONFIG_MIGRATION_MODE, DEFAULT_MIGRATION_MODE)
+        if migration_mode == MIGRATION_MODE_SKIP:
+            LOGGER.warning(
+                "Skipping database migrations, make sure the database is up to date"
+            )
+            self._migrations_done.set()
+            if self._session_factory:
+                startup_chores(self._session_factory)
+            return
 
-        self._get_session = scoped_session(sessionmaker(bind=self.engine, future=True))
-        startup_chores(self._get_session)
+        if (
+            cached_head := self._read_cached_head()
+        ) is not None and cached_head == _alembic_head():
+            try:
+                if self._session_factory:
+                    startup_chores(self._session_factory)
+            except SQLAlchemyError as error:
+                # The cache file lives outside the database and survives a
+                # wiped or restored database, so do not trust it blindly:
+                # fall back to the full migration check
+                LOGGER.warning(
+                    f"Cached revision {cached_head} does not match the "
+                    f"database, running migration check: {error}"
+                )
+                self._invalidate_cached_head()
+            else:
+                LOGGER.debug(
+                    f"Database already at revision {cached_head}, "
+                    "skipping migration check"
+                )
+                self._migrations_done.set()
+                return
+
+        if migration_mode == MIGRATION_MODE_ASYNC:
+            threading.Thread(
+                target=self._apply_migrations,
+                name="storage_migrations",
+                daemon=True,
+            ).start()
+        else:
+            self._apply_migrations()
 
     def get_session(self) -> Session:
-        """Get a new sqlalchemy session."""
-        if self._get_session is None:
+        """Get a new sqlalchemy session.
+
+        Blocks until any pending database migrations have been applied.
+        """
+        if self._session_factory is None:
             raise RuntimeError("The database connection has not been established")
-        return self._get_session()
+        self._migrations_done.wait()
+        if self._migrations_failed:
+            raise RuntimeError("Database migrations failed, check the logs for details")
+        session = self._session_factory()
+        self._open_sessions.add(session)
+        return session
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Provide a transactional session scope.
+
+        Commits when the scope exits cleanly, rolls back on error and always
+        closes the session. Preferred over get_session for new call sites,
+        since sessions that are never closed leak pooled connections.
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
     def get_recordings_path(self, camera: AbstractCamera) -> str:
         """Get recordings path for camera."""
-        self.create_tier_handlers(camera)
-        return get_recorder_path(
-            self._camera_tier_handlers[camera.identifier]["recorder"][0][
-                "recordings"
-            ].tier,
-            camera,
-            "recordings",
-        )
+        cache_key = (camera.identifier, "recordings")
+        if (path := self._camera_path_cache.get(cache_key)) is None:
+            self.create_tier_handlers(camera)
+            path = get_recorder_path(
+                self._camera_tier_handlers[camera.identifier]["recorder"][0][
+                    "recordings"
+                ].tier,
+                camera,
+                "recordings",
+            )
+            self._camera_path_cache[cache_key] = path
+        return path
 
     def get_segments_path(self, camera: AbstractCamera) -> str:
         """Get segments path for camera."""
-        self.create_tier_handlers(camera)
-        return get_recorder_path(
-            self._camera_tier_handlers[camera.identifier]["recorder"][0][
-                "segments"
-            ].tier,
-            camera,
-            "segments",
-        )
+        cache_key = (camera.identifier, "segments")
+        if (path := self._camera_path_cache.get(cache_key)) is None:
+            self.create_tier_handlers(camera)
+            path = get_recorder_path(
+                self._camera_tier_handlers[camera.identifier]["recorder"][0][
+                    "segments"
+                ].tier,
+                camera,
+                "segments",
+            )
+            self._camera_path_cache[cache_key] = path
+        return path
 
     def get_thumbnails_path(self, camera: AbstractCamera) -> str:
         """Get thumbnails path for camera.
@@ -287,13 +566,17 @@ class Storage:
         moved up tiers. Files are cleaned up automatically with the corresponding
         recording.
         """
-        self.create_tier_handlers(camera)
-        return get_thumbnails_path(
-            self._camera_tier_handlers[camera.identifier]["recorder"][0][
-                "recordings"
-            ].tier,
-            camera,
-        )
+        cache_key = (camera.identifier, "thumbnails")
+        if (path := self._camera_path_cache.get(cache_key)) is None:
+            self.create_tier_handlers(camera)
+            path = get_thumbnails_path(
+                self._camera_tier_handlers[camera.identifier]["recorder"][0][
+                    "recordings"
+                ].tier,
+                camera,
+            )
+            self._camera_path_cache[cache_key] = path
+        return path
 
     def get_snapshots_path(
         self,
@@ -304,12 +587,18 @@ class Storage:
         | Literal["motion_detector"],
     ) -> str:
         """Get snapshots path for camera."""
-        self.create_tier_handlers(camera)
-        return get_snapshots_path(
-            self._camera_tier_handlers[camera.identifier]["snapshots"][0][domain].tier,
-            camera,
-            domain,
-        )
+        cache_key = (camera.identifier, domain)
+        if (path := self._camera_path_cache.get(cache_key)) is None:
+            self.create_tier_handlers(camera)
+            path = get_snapshots_path(
+                self._camera_tier_handlers[camera.identifier]["snapshots"][0][
+                    domain
+                ].tier,
+                camera,
+                domain,
+            )
+            self._camera_path_cache[cache_key] = path
+        return path
 
     def search_file(
         self, camera_identifier: str, category: str, subcategory: str, path: str
@@ -357,20 +646,28 @@ class Storage:
         self.camera_requested_files_count[camera.identifier] = RequestedFilesCount()
 
         tier_config = _get_tier_config(self._config, camera)
-        for category in TIER_CATEGORIES:
-            self._camera_tier_handlers[camera.identifier].setdefault(category, [])
-            tiers = tier_config[category][CONFIG_TIERS]
-            for index, tier in enumerate(tiers):
-                self._camera_tier_handlers[camera.identifier][category].append({})
-                if index == len(tiers) - 1:
-                    next_tier = None
-                else:
-                    next_tier = tiers[index + 1]
-                # pylint: disable-next=line-too-long
-                for subcategory in TIER_CATEGORIES[category]:  # type: ignore[literal-required] # noqa: E501
-                    self._camera_tier_handlers[camera.identifier][category][index][
-                        subcategory["subcategory"]
-                    ] = subcategory["tier_handler"](
+        if tier_config is self._config and self._tier_plan is not None:
+            tier_plan = self._tier_plan
+        else:
+            tier_plan = _build_tier_plan(tier_config)
+
+        # Submit the constructions to the worker pool and collect the results,
+        # amortizing the per-handler setup cost over the pool
+        pending: list[tuple[dict[str, Any], str, Future]] = []
+        for category, index, tier, next_tier, subcategory in tier_plan:
+            handlers = self._camera_tier_handlers[camera.identifier].setdefault(
+                category, []
+            )
+            if len(handlers) <= index:
+                handlers.append({})
+            if self._tier_handler_executor is None:
+                raise RuntimeError("Storage component has not been initialized")
+            pending.append(
+                (
+                    handlers[index],
+                    subcategory["subcategory"],
+                    self._tier_handler_executor.submit(
+                        subcategory["tier_handler"],
                         self._vis,
                         camera,
                         index,
@@ -378,10 +675,19 @@ class Storage:
                         subcategory["subcategory"],
                         tier,
                         next_tier,
-                    )
+                        executor=self._tier_handler_executor,
+                    ),
+                )
+            )
+        for tier_handlers, subcategory_name, future in pending:
+            tier_handlers[subcategory_name] = future.result()
 
     def _shutdown(self) -> None:
         """Shutdown."""
+        if self._tier_handler_executor:
+            self._tier_handler_executor.shutdown(wait=False)
+        for session in list(self._open_sessions):
+            session.close()
         if self.engine:
             self.engine.dispose()
 
@@ -394,10 +700,12 @@ def _get_tier_config(config: dict[str, Any], camera: AbstractCamera) -> dict[str
     camera > recorder > continuous/events is looked at first.
     camera > recorder > storage > tiers is looked at second.
     storage > recorder > tiers is looked at last.
+
+    Returns the passed in config unchanged when the camera has no tier
+    overrides, so create_tier_handlers can reuse the precomputed tier plan.
     """
     if not hasattr(camera, "config"):
         return config
-    tier_config = copy.deepcopy(config)
     _tier: dict[str, Any] = {}
     if camera.config[CONFIG_RECORDER].get(CONFIG_CONTINUOUS, None) or camera.config[
         CONFIG_RECORDER
@@ -414,14 +722,16 @@ def _get_tier_config(config: dict[str, Any], camera: AbstractCamera) -> dict[str
         _tier[CONFIG_EVENTS] = events
         _tier[CONFIG_MOVE_ON_SHUTDOWN] = False
         _tier[CONFIG_POLL] = False
+        tier_config = copy.deepcopy(config)
         tier_config[CONFIG_RECORDER][CONFIG_TIERS] = [_tier]
     elif camera.config[CONFIG_RECORDER][CONFIG_STORAGE]:
         _tier = camera.config[CONFIG_RECORDER][CONFIG_STORAGE][CONFIG_TIERS]
+        tier_config = copy.deepcopy(config)
         tier_config[CONFIG_RECORDER][CONFIG_TIERS] = _tier
+    else:
+        return config
 
-    if _tier:
-        LOGGER.debug(
-            f"Camera {camera.name} has custom tiers, "
-            "overwriting storage recorder tiers"
-        )
+    LOGGER.debug(
+        f"Camera {camera.name} has custom tiers, " "overwriting storage recorder tiers"
+    )
     return tier_config
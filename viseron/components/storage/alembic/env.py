@@ -78,6 +78,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            transactional_ddl=context.config.attributes.get("transactional_ddl", None),
         )
 
         with context.begin_transaction():
@@ -18,6 +18,7 @@ from viseron.components.storage.const import (
     CONFIG_MAX_AGE,
     CONFIG_MAX_SIZE,
     CONFIG_MB,
+    CONFIG_MIGRATION_MODE,
     CONFIG_MIN_AGE,
     CONFIG_MIN_SIZE,
     CONFIG_MINUTES,
@@ -26,6 +27,7 @@ from viseron.components.storage.const import (
     CONFIG_OBJECT_DETECTOR,
     CONFIG_PATH,
     CONFIG_POLL,
+    CONFIG_POOL_SIZE,
     CONFIG_RECORDER,
     CONFIG_SECONDS,
     CONFIG_SNAPSHOTS,
@@ -45,6 +47,7 @@ from viseron.components.storage.const import (
     DEFAULT_MAX_AGE,
     DEFAULT_MAX_SIZE,
     DEFAULT_MB,
+    DEFAULT_MIGRATION_MODE,
     DEFAULT_MIN_AGE,
     DEFAULT_MIN_SIZE,
     DEFAULT_MINUTES,
@@ -52,6 +55,7 @@ from viseron.components.storage.const import (
     DEFAULT_MOVE_ON_SHUTDOWN,
     DEFAULT_OBJECT_DETECTOR,
     DEFAULT_POLL,
+    DEFAULT_POOL_SIZE,
     DEFAULT_RECORDER,
     DEFAULT_RECORDER_TIERS,
     DEFAULT_SNAPSHOTS,
@@ -73,6 +77,7 @@ from viseron.components.storage.const import (
     DESC_MAX_MB,
     DESC_MAX_MINUTES,
     DESC_MAX_SIZE,
+    DESC_MIGRATION_MODE,
     DESC_MIN_AGE,
     DESC_MIN_DAYS,
     DESC_MIN_GB,
@@ -85,16 +90,22 @@ from viseron.components.storage.const import (
     DESC_OBJECT_DETECTOR,
     DESC_PATH,
     DESC_POLL,
+    DESC_POOL_SIZE,
     DESC_RECORDER,
     DESC_RECORDER_TIERS,
     DESC_SNAPSHOTS,
     DESC_SNAPSHOTS_TIERS,
+    MIGRATION_MODE_ASYNC,
+    MIGRATION_MODE_SKIP,
+    MIGRATION_MODE_SYNC,
 )
 from viseron.components.storage.util import calculate_age
 from viseron.config import UNSUPPORTED
 from viseron.const import TEMP_DIR
 from viseron.helpers.validators import CoerceNoneToDict, Maybe
 
+_RESERVED_PATHS = frozenset({"/tmp", TEMP_DIR})
+
 
 def custom_convert(value) -> dict[str, str] | object:
     """Convert custom validators for the script gen_docs."""
@@ -294,6 +305,16 @@ TIER_SCHEMA_RECORDER = vol.Schema(
 
 STORAGE_SCHEMA = vol.Schema(
     {
+        vol.Optional(
+            CONFIG_MIGRATION_MODE,
+            default=DEFAULT_MIGRATION_MODE,
+            description=DESC_MIGRATION_MODE,
+        ): vol.In([MIGRATION_MODE_ASYNC, MIGRATION_MODE_SYNC, MIGRATION_MODE_SKIP]),
+        vol.Optional(
+            CONFIG_POOL_SIZE,
+            default=DEFAULT_POOL_SIZE,
+            description=DESC_POOL_SIZE,
+        ): Maybe(vol.All(int, vol.Range(min=1))),
         vol.Optional(
             CONFIG_RECORDER,
             default=DEFAULT_RECORDER,
@@ -374,22 +395,27 @@ STORAGE_SCHEMA = vol.Schema(
 )
 
 
-def _check_tier(tier: Tier, previous_tier: Tier | None, paths: list[str]):
-    """Check tier config."""
-    if tier[CONFIG_PATH] in ["/tmp", TEMP_DIR]:
+def _check_tier(
+    tier: Tier, previous_tier_max_age: float | None, paths: set[str]
+) -> float:
+    """Check tier config.
+
+    Returns the max_age of the tier in seconds so that the caller can pass it
+    along for the next tier, avoiding recomputing it.
+    """
+    if tier[CONFIG_PATH] in _RESERVED_PATHS:
         raise vol.Invalid(
             f"Tier {tier[CONFIG_PATH]} is a reserved path and cannot be used"
         )
 
     if tier[CONFIG_PATH] in paths:
         raise vol.Invalid(f"Tier {tier[CONFIG_PATH]} is defined multiple times")
-    paths.append(tier[CONFIG_PATH])
-
-    if previous_tier is None:
-        return
+    paths.add(tier[CONFIG_PATH])
 
     tier_max_age = calculate_age(tier[CONFIG_MAX_AGE]).total_seconds()
-    previous_tier_max_age = calculate_age(previous_tier[CONFIG_MAX_AGE]).total_seconds()
+
+    if previous_tier_max_age is None:
+        return tier_max_age
 
     if (
         tier_max_age > 0  # pylint: disable=chained-comparison
@@ -399,6 +425,7 @@ def _check_tier(tier: Tier, previous_tier: Tier | None, paths: list[str]):
             f"Tier {tier[CONFIG_PATH]} "
             "max_age must be greater than previous tier max_age"
         )
+    return tier_max_age
 
 
 class Tier(TypedDict):
@@ -417,34 +444,42 @@ def validate_tiers(config: dict[str, Any]) -> dict[str, Any]:
     """
     component_config: dict[str, Any] = config[COMPONENT]
 
+    tiers = component_config.get(CONFIG_RECORDER, {}).get(CONFIG_TIERS, [])
+    # Fast path for the common single tier configuration, where there are no
+    # duplicate paths or max_age ordering to validate
+    if len(tiers) <= 1:
+        if tiers and tiers[0][CONFIG_PATH] in _RESERVED_PATHS:
+            raise vol.Invalid(
+                f"Tier {tiers[0][CONFIG_PATH]} is a reserved path and cannot be used"
+            )
+        return config
+
     # Check events config
-    previous_tier: None | Tier = None
-    paths: list[str] = []
-    for tier in component_config.get(CONFIG_RECORDER, {}).get(CONFIG_TIERS, []):
+    previous_tier_max_age: float | None = None
+    paths: set[str] = set()
+    for tier in tiers:
         if tier.get(CONFIG_EVENTS, None):
             _tier = Tier(
                 path=tier[CONFIG_PATH], max_age=tier[CONFIG_EVENTS][CONFIG_MAX_AGE]
             )
-            _check_tier(
+            previous_tier_max_age = _check_tier(
                 _tier,
-                previous_tier,
+                previous_tier_max_age,
                 paths,
             )
-            previous_tier = _tier
 
     # Check continuous config
-    previous_tier = None
-    paths = []
-    for tier in component_config.get(CONFIG_RECORDER, {}).get(CONFIG_TIERS, []):
+    previous_tier_max_age = None
+    paths = set()
+    for tier in tiers:
         if tier.get(CONFIG_CONTINUOUS, None):
             _tier = Tier(
                 path=tier[CONFIG_PATH], max_age=tier[CONFIG_CONTINUOUS][CONFIG_MAX_AGE]
             )
-            _check_tier(
+            previous_tier_max_age = _check_tier(
                 _tier,
-                previous_tier,
+                previous_tier_max_age,
                 paths,
             )
-            previous_tier = _tier
 
     return config
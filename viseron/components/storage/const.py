@@ -40,6 +40,12 @@ CONFIG_OBJECT_DETECTOR: Final = "object_detector"
 CONFIG_LICENSE_PLATE_RECOGNITION: Final = "license_plate_recognition"
 CONFIG_MOTION_DETECTOR: Final = "motion_detector"
 CONFIG_TIERS: Final = "tiers"
+CONFIG_MIGRATION_MODE: Final = "migration_mode"
+CONFIG_POOL_SIZE: Final = "pool_size"
+
+MIGRATION_MODE_ASYNC: Final = "async"
+MIGRATION_MODE_SYNC: Final = "sync"
+MIGRATION_MODE_SKIP: Final = "skip"
 
 
 DEFAULT_RECORDER: dict[str, Any] = {}
@@ -85,6 +91,8 @@ DEFAULT_MIN_AGE: dict[str, Any] = {}
 DEFAULT_MAX_AGE: dict[str, Any] = {}
 DEFAULT_CONTINUOUS: Final = None
 DEFAULT_EVENTS: Final = None
+DEFAULT_MIGRATION_MODE: Final = MIGRATION_MODE_ASYNC
+DEFAULT_POOL_SIZE: Final = None
 
 DESC_RECORDER = "Configuration for recordings."
 DESC_TYPE = (
@@ -159,3 +167,15 @@ DESC_MIN_AGE = "Minimum age of files to keep in this tier."
 DESC_MAX_AGE = "Maximum age of files to keep in this tier."
 DESC_CONTINUOUS = "Retention rules for continuous recordings."
 DESC_EVENTS = "Retention rules for event recordings."
+DESC_POOL_SIZE = (
+    "Number of database connections to keep open in the connection pool. "
+    "If not set, the pool is sized to the number of CPUs."
+)
+DESC_MIGRATION_MODE = (
+    "How to apply database migrations on startup.<br>"
+    "<code>async</code>: Apply migrations in the background while Viseron starts. "
+    "Database access is blocked until the migrations are done.<br>"
+    "<code>sync</code>: Apply migrations before continuing startup.<br>"
+    "<code>skip</code>: Do not check for or apply migrations. "
+    "Only use this if you know the database is up to date."
+)
@@ -63,6 +63,8 @@ from viseron.helpers import utcnow
 from viseron.watchdog.thread_watchdog import RestartableThread
 
 if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
     from viseron import Viseron
     from viseron.components.storage import Storage
     from viseron.components.webserver import Webserver
@@ -81,6 +83,7 @@ class TierHandler(FileSystemEventHandler):
         subcategory: str,
         tier: dict[str, Any],
         next_tier: dict[str, Any] | None,
+        executor: ThreadPoolExecutor | None = None,
     ) -> None:
         self._logger = logging.getLogger(
             f"{__name__}.{camera.identifier}.tier_{tier_id}"
@@ -96,6 +99,7 @@ class TierHandler(FileSystemEventHandler):
         self._subcategory = subcategory
         self._tier = tier
         self._next_tier = next_tier
+        self._executor = executor
 
         self.initialize()
         vis.register_signal_handler(VISERON_SIGNAL_LAST_WRITE, self._shutdown)
@@ -182,9 +186,21 @@ class TierHandler(FileSystemEventHandler):
             time_since_last_call = now - self._time_of_last_call
             if time_since_last_call < self._throttle_period:
                 return
+            # Marked as checked before the work runs so that events arriving
+            # within the throttle window coalesce into a single pass
+            self._time_of_last_call = now
+
+        if self._executor:
+            self._executor.submit(self._run_check_tier)
+        else:
+            self._run_check_tier()
 
-        self._check_tier(self._storage.get_session)
-        self._time_of_last_call = now
+    def _run_check_tier(self) -> None:
+        """Run _check_tier, logging errors instead of losing them in the pool."""
+        try:
+            self._check_tier(self._storage.get_session)
+        except Exception as error:  # pylint: disable=broad-except
+            self._logger.error(f"Failed to check tier: {error}", exc_info=True)
 
     def _check_tier(self, get_session: Callable[[], Session]) -> None:
         file_ids = None
@@ -77,6 +77,32 @@ def get_snapshots_path(
     return os.path.join(tier[CONFIG_PATH], "snapshots", domain, camera.identifier)
 
 
+def create_index_concurrently(name: str, table: str, columns: list[str]) -> None:
+    """Create an index without taking an exclusive table lock.
+
+    Meant to be used from alembic migrations instead of op.create_index, since
+    a plain CREATE INDEX holds an ACCESS EXCLUSIVE lock on the table for the
+    duration of the build. CREATE INDEX CONCURRENTLY cannot run inside a
+    transaction, so it is executed in an autocommit block. Dialects other than
+    PostgreSQL fall back to a regular CREATE INDEX.
+
+    NOT NULL columns should be added with a similar batched pattern:
+    ADD COLUMN ... NULL, backfill in batches, then SET NOT NULL.
+    """
+    # Local import, op is only usable while a migration is running
+    from alembic import op  # pylint: disable=import-outside-toplevel
+
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(name, table, columns)
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} ({', '.join(columns)})"
+        )
+
+
 def files_to_move_overlap(events_file_ids, continuous_file_ids):
     """Find the files that are in both events and continuous delete list."""
     events_dict = {row.file_id: row for row in events_file_ids}